@@ -103,8 +103,22 @@ def spectra2lab(df, observer=10, illuminant='D65'):
     illuminant: default 'D65'.  Can be 'A', 'D50', 'D65', or 'D75'
     """
     
-    XYZ = spectra2xyz(df, observer=observer, illuminant=illuminant) / 100
-    
+    XYZ = spectra2xyz(df, observer=observer, illuminant=illuminant)
+
+    return xyz2lab(XYZ, observer=observer, illuminant=illuminant)
+
+def xyz2lab(XYZ, observer=10, illuminant='D65'):
+    """
+    Converts a CIE XYZ color (0-100 scale, as returned by spectra2xyz) into
+    CIE L*a*b* Color Space using skimage.color.xyz2lab.
+
+    parameters:
+    observer: default 10.  CIE Standard Observer Can be either '2' or 
+    '10' following skimage.color convention or input as integers 2 or 10
+    illuminant: default 'D65'.  Can be 'A', 'D50', 'D65', or 'D75'
+    """
+    XYZ = np.asarray(XYZ) / 100
+
     if (observer == '10') or (observer == 10):
         obs = '10'
     elif (observer == '2') or (observer == 2):
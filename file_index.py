@@ -0,0 +1,294 @@
+import os
+import re
+import hashlib
+import sqlite3
+from pathlib import Path
+
+"""
+    Persistent File Index
+
+This module keeps an on-disk SQLite index of the files beneath a directory
+(path, size, mtime) so that repeatedly polling the same data directories
+becomes an incremental operation.  A directory's mtime only changes when
+entries are added, removed or renamed inside it, so refresh_index() only
+re-lists directories whose mtime changed and simply re-stats the files it
+already knows about everywhere else.
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT,
+    name TEXT,
+    size INTEGER,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+"""
+
+# Default location of the index files, outside of the indexed directories
+INDEX_DIR = '~/.cache/wtdlib/file_index'
+
+def _default_index_path(root):
+    """
+    local function returning the default index location for root, keyed
+    by a hash of its absolute path
+    """
+    digest = hashlib.sha1(root.encode('utf-8')).hexdigest()
+    index_dir = Path(INDEX_DIR).expanduser()
+    index_dir.mkdir(parents=True, exist_ok=True)
+    return str(index_dir.joinpath(digest + '.sqlite'))
+
+def _connect(index_path):
+    """
+    local function to open the index database and create the tables
+    """
+    conn = sqlite3.connect(str(index_path))
+    conn.executescript(_SCHEMA)
+    conn.create_function('REGEXP', 2, _regexp, deterministic=True)
+    return conn
+
+def _regexp(pattern, value):
+    """
+    local function registered as the SQLite REGEXP operator
+    """
+    return _compile(pattern).match(value) is not None
+
+_compiled = {}
+def _compile(pattern):
+    """
+    local function to cache compiled regular expressions
+    """
+    regex = _compiled.get(pattern)
+    if regex is None:
+        regex = _compiled[pattern] = re.compile(pattern)
+    return regex
+
+def _char_class(chars, negate=False):
+    """
+    local function translating the inside of a glob character class into a
+    regular expression class.  Every character is escaped, as with
+    fnmatch.translate, and only 'a-z' style ranges are kept.
+    """
+    body = ''
+    n = 0
+    while n < len(chars):
+        if n + 2 < len(chars) and chars[n + 1] == '-':
+            lo, hi = chars[n], chars[n + 2]
+            # Empty ranges (i.e. 'z-a') match nothing, as in fnmatch
+            if lo <= hi:
+                body += re.escape(lo) + '-' + re.escape(hi)
+            n += 3
+        else:
+            body += re.escape(chars[n])
+            n += 1
+    if not body and not negate:
+        # Nothing can match
+        return '(?!)'
+    # Negated classes never match the path separator
+    return '[^/' + body + ']' if negate else '[' + body + ']'
+
+def _glob_to_regex(glob_phrase):
+    """
+    Translates a pathlib style glob into a regular expression that matches
+    paths relative to the indexed directory (always '/' separated).
+    '**' matches any number of directories, '*' and '?' never match '/'.
+    A trailing '**' matches every file below the directory, whereas
+    Path.glob before Python 3.13 only yields directories for it (so
+    utils2.pathlib_glob(directory, '**') returns []).
+    """
+    parts = glob_phrase.replace('\\', '/').strip('/').split('/')
+    regex = ''
+    for i, part in enumerate(parts):
+        last = (i == len(parts) - 1)
+        if part == '**':
+            regex += '.*' if last else '(?:.*/)?'
+            continue
+        j = 0
+        while j < len(part):
+            c = part[j]
+            if c == '*':
+                regex += '[^/]*'
+            elif c == '?':
+                regex += '[^/]'
+            elif c == '[':
+                k = part.find(']', j + 2)
+                if k == -1:
+                    regex += re.escape(c)
+                else:
+                    chars = part[j + 1:k]
+                    negate = chars[0] == '!'
+                    if negate:
+                        chars = chars[1:]
+                    regex += _char_class(chars, negate)
+                    j = k
+            else:
+                regex += re.escape(c)
+            j += 1
+        if not last:
+            regex += '/'
+    return regex + r'\Z'
+
+def refresh_index(directory, index_path=None, stat_files=True):
+    """
+    Brings the file index for directory up to date, and returns the changes
+    since the previous refresh as a dict of lists of relative paths:
+    {'added': [...], 'modified': [...], 'removed': [...]}
+
+    On the first call every directory is listed.  Afterwards only
+    directories whose mtime changed are listed again.
+
+    parameters:
+    index_path: default None.  Location of the SQLite index.  If None, the
+    index is stored under INDEX_DIR, named by a hash of the absolute path
+    of directory.  Keep the index outside of directory, otherwise every
+    write to it changes the directory mtime.
+    stat_files: default True.  If True, files in unchanged directories are
+    re-stat'ed to detect files modified in place (which does not change the
+    directory mtime).  If False, only added and removed files are detected.
+    """
+    root = os.path.abspath(directory)
+    if index_path is None:
+        index_path = _default_index_path(root)
+    index_abs = os.path.abspath(index_path)
+
+    added, modified, removed = [], [], []
+    conn = _connect(index_path)
+    try:
+        known_dirs = dict(conn.execute('SELECT path, mtime_ns FROM dirs'))
+        seen_dirs = set()
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+            try:
+                dir_mtime = os.stat(abs_dir).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            seen_dirs.add(rel_dir)
+            known_files = dict(
+                (row[0], (row[1], row[2])) for row in conn.execute(
+                    'SELECT path, size, mtime_ns FROM files WHERE dir = ?', (rel_dir,)
+                )
+            )
+
+            if known_dirs.get(rel_dir) == dir_mtime:
+                # Directory listing is unchanged, reuse the indexed entries
+                stack.extend(row[0] for row in conn.execute(
+                    'SELECT path FROM dirs WHERE parent = ? AND path != ?', (rel_dir, rel_dir)
+                ))
+                if not stat_files:
+                    continue
+                for rel_path, old in known_files.items():
+                    try:
+                        st = os.stat(os.path.join(root, rel_path))
+                    except FileNotFoundError:
+                        removed.append(rel_path)
+                        conn.execute('DELETE FROM files WHERE path = ?', (rel_path,))
+                        continue
+                    if (st.st_size, st.st_mtime_ns) != old:
+                        modified.append(rel_path)
+                        conn.execute(
+                            'UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?',
+                            (st.st_size, st.st_mtime_ns, rel_path)
+                        )
+                continue
+
+            # Directory listing changed (or is new), list it again
+            current = set()
+            with os.scandir(abs_dir) as entries:
+                for entry in entries:
+                    rel_path = rel_dir + '/' + entry.name if rel_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(rel_path)
+                        continue
+                    if not entry.is_file() or os.path.abspath(entry.path) == index_abs:
+                        continue
+                    if entry.name.startswith(os.path.basename(index_abs) + '-'):
+                        # SQLite journal files
+                        continue
+                    st = entry.stat()
+                    current.add(rel_path)
+                    old = known_files.get(rel_path)
+                    if old is None:
+                        added.append(rel_path)
+                    elif old != (st.st_size, st.st_mtime_ns):
+                        modified.append(rel_path)
+                    else:
+                        continue
+                    conn.execute(
+                        'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)',
+                        (rel_path, rel_dir, entry.name, st.st_size, st.st_mtime_ns)
+                    )
+            for rel_path in set(known_files) - current:
+                removed.append(rel_path)
+                conn.execute('DELETE FROM files WHERE path = ?', (rel_path,))
+            parent = rel_dir.rpartition('/')[0] if rel_dir else None
+            conn.execute(
+                'INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)', (rel_dir, parent, dir_mtime)
+            )
+
+        # Remove directories (and their files) that no longer exist
+        for rel_dir in set(known_dirs) - seen_dirs:
+            removed.extend(row[0] for row in conn.execute(
+                'SELECT path FROM files WHERE dir = ?', (rel_dir,)
+            ))
+            conn.execute('DELETE FROM files WHERE dir = ?', (rel_dir,))
+            conn.execute('DELETE FROM dirs WHERE path = ?', (rel_dir,))
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {'added': sorted(added), 'modified': sorted(modified), 'removed': sorted(removed)}
+
+def index_glob(directory, glob_phrase, files=False, reverse=False, index_path=None, refresh=True):
+    """
+    Indexed equivalent of utils2.pathlib_glob(directory, glob_phrase).
+    Returns a sorted list of the file paths matching glob_phrase, answered
+    from the file index rather than by walking the directory tree.
+    Unlike pathlib_glob, a trailing '**' matches every file (see
+    _glob_to_regex).
+
+    parameters:
+    files: default False.  If False, returns the full path of each file.
+    If True, returns only file names.
+    reverse: default False.  Sort order of the returned list.
+    index_path: default None.  See refresh_index().
+    refresh: default True.  If True, the index is refreshed before the
+    query.  Set to False to query the index as it was last refreshed.
+    """
+    root = os.path.abspath(directory)
+    if index_path is None:
+        index_path = _default_index_path(root)
+    if refresh:
+        refresh_index(directory, index_path=index_path)
+
+    conn = _connect(index_path)
+    try:
+        rows = conn.execute(
+            'SELECT path, name FROM files WHERE path REGEXP ?', (_glob_to_regex(glob_phrase),)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    if files:
+        results = [name for path, name in rows]
+    else:
+        results = [str(Path(directory).joinpath(path)) for path, name in rows]
+    return sorted(set(results), reverse=reverse)
+
+def index_listdir(directory, reverse=False, index_path=None, refresh=True):
+    """
+    Indexed equivalent of utils2.pathlib_listdir(directory).
+    Returns a sorted list of the names of every file beneath directory.
+    """
+    return index_glob(
+        directory, '**/*', files=True, reverse=reverse,
+        index_path=index_path, refresh=refresh
+    )
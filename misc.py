@@ -9,13 +9,18 @@ def timer(t, message="Time's up!"):
         message: default "Time's up!"
         string to print upon conclusion of the function
         if message == None, nothing will be printed
+
+    See timing.countdown() for sub-second intervals and timing.countdown_async()
+    for asyncio code.
     """
-    while t:
-        mins, secs = divmod(t, 60)
+    start = time.monotonic()
+    for elapsed in range(t):
+        mins, secs = divmod(t - elapsed, 60)
         timer = '{:02d}:{:02d}'.format(mins, secs)
         print(timer, end="\r")  # Overwrite previous output
-        time.sleep(1)
-        t -= 1
+        # Sleep until the next whole second rather than a fixed 1 second,
+        # so print and loop overhead do not accumulate.
+        time.sleep(max(0.0, start + elapsed + 1 - time.monotonic()))
     if (message != None):
         print(message)
 
@@ -0,0 +1,224 @@
+import math
+import random
+
+import numpy as np
+
+"""
+    Sieve-backed Number Theory
+
+Batch replacements for utils2.factor and utils2.is_prime.  A smallest prime
+factor (SPF) table is cached at module level and grown segment by segment
+as larger numbers are requested, up to SIEVE_LIMIT.  Numbers beyond the
+sieve are handled with deterministic Miller-Rabin (exact for all 64-bit
+integers) and Pollard's rho.
+
+https://en.wikipedia.org/wiki/Sieve_of_Eratosthenes#Segmented_sieve
+https://en.wikipedia.org/wiki/Miller%E2%80%93Rabin_primality_test
+"""
+
+# Largest number the SPF table will grow to cover (int32 table, 4 bytes per entry)
+SIEVE_LIMIT = 10**7
+
+# Bases giving a deterministic Miller-Rabin test for n < 3.3e24
+_MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+_spf = np.array([0, 1], dtype=np.int32)
+
+def _extend_sieve(n):
+    """
+    local function to grow the cached SPF table so it covers 0..n.
+    Only the new segment is sieved, using the primes already in the table.
+    """
+    global _spf
+    old_n = _spf.size
+    if n < old_n:
+        return
+    new_n = min(max(n + 1, 2 * old_n), SIEVE_LIMIT + 1)
+    root = math.isqrt(new_n - 1)
+    if root >= old_n:
+        _extend_sieve(root)
+        old_n = _spf.size
+
+    seg = np.zeros(new_n - old_n, dtype=np.int32)
+    for p in np.flatnonzero(_spf[:root + 1] == np.arange(root + 1)):
+        p = int(p)
+        if p < 2:
+            continue
+        start = max(p * p, -(-old_n // p) * p)
+        if start >= new_n:
+            continue
+        view = seg[start - old_n::p]
+        view[view == 0] = p
+    # Entries left unmarked are prime, and are their own smallest factor
+    unmarked = seg == 0
+    seg[unmarked] = np.arange(old_n, new_n, dtype=np.int32)[unmarked]
+    _spf = np.concatenate([_spf, seg])
+
+def spf_table(n):
+    """
+    Returns the smallest prime factor table for 0..n as a numpy array,
+    where spf_table(n)[k] is the smallest prime factor of k.
+    (0 and 1 map to themselves.)  n must not exceed SIEVE_LIMIT.
+    """
+    if n > SIEVE_LIMIT:
+        raise ValueError('n = {} exceeds SIEVE_LIMIT = {}'.format(n, SIEVE_LIMIT))
+    _extend_sieve(n)
+    return _spf[:n + 1]
+
+def miller_rabin(n):
+    """
+    Returns True if the integer n is prime using a deterministic
+    Miller-Rabin test, exact for every n < 3.3e24 (all 64-bit integers).
+    """
+    n = int(n)
+    if n < 2:
+        return False
+    for p in _MR_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _MR_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def _as_integers(values):
+    """
+    local function converting values to an integer numpy array.  Values
+    that do not fit in int64 / uint64 are kept as Python ints (object dtype).
+    """
+    if not isinstance(values, np.ndarray):
+        try:
+            return np.asarray(values, dtype=np.int64)
+        except OverflowError:
+            return np.asarray(values, dtype=object)
+    arr = values
+    if arr.dtype.kind in 'iu':
+        return arr
+    if arr.dtype.kind in 'fb':
+        return arr.astype(np.int64)
+    return arr.astype(object)
+
+def is_prime_array(values):
+    """
+    Vectorized primality test.  Takes an integer or array-like of integers
+    and returns a boolean numpy array of the same shape.
+    Values up to SIEVE_LIMIT are looked up in the SPF table, larger values
+    are tested with miller_rabin().
+    """
+    arr = _as_integers(values)
+    result = np.zeros(arr.shape, dtype=bool)
+    small = np.asarray((arr >= 2) & (arr <= SIEVE_LIMIT), dtype=bool)
+    if small.any():
+        small_values = arr[small].astype(np.int64)
+        table = spf_table(int(small_values.max()))
+        result[small] = table[small_values] == small_values
+    large = np.asarray(arr > SIEVE_LIMIT, dtype=bool)
+    if large.any():
+        result[large] = [miller_rabin(int(v)) for v in arr[large]]
+    return result
+
+def _pollard_brent(n):
+    """
+    local function returning a non-trivial factor of the composite n
+    https://en.wikipedia.org/wiki/Pollard%27s_rho_algorithm#Variants
+    """
+    if n % 2 == 0:
+        return 2
+    while True:
+        y, c, m = random.randrange(1, n), random.randrange(1, n), 128
+        g, r, q = 1, 1, 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+def prime_factors(n):
+    """
+    Returns a sorted list of the prime factors of the integer n, with
+    repetition (i.e. prime_factors(12) == [2, 2, 3]).
+    """
+    n = int(n)
+    if n < 1:
+        raise ValueError('n must be a positive integer')
+    factors = []
+    stack = [n]
+    while stack:
+        m = stack.pop()
+        if m == 1:
+            continue
+        if m <= SIEVE_LIMIT:
+            table = spf_table(m)
+            while m > 1:
+                p = int(table[m])
+                factors.append(p)
+                m //= p
+        elif miller_rabin(m):
+            factors.append(m)
+        else:
+            d = _pollard_brent(m)
+            stack.extend([d, m // d])
+    return sorted(factors)
+
+def factorize(n):
+    """
+    Returns the prime factorization of the integer n as a dict of
+    {prime: exponent} (i.e. factorize(12) == {2: 2, 3: 1}).
+    """
+    result = {}
+    for p in prime_factors(n):
+        result[p] = result.get(p, 0) + 1
+    return result
+
+def divisors(n):
+    """
+    Returns a sorted numpy array of every divisor of the integer n,
+    built from its prime factorization.  Equivalent to utils2.factor(n).
+    """
+    divs = np.array([1], dtype=object if n > np.iinfo(np.int64).max else np.int64)
+    for p, e in factorize(n).items():
+        powers = np.array([p**k for k in range(e + 1)], dtype=divs.dtype)
+        divs = np.outer(divs, powers).ravel()
+    return np.sort(divs)
+
+def smallest_prime_factor(values):
+    """
+    Vectorized smallest prime factor lookup for an integer or array-like of
+    integers no larger than SIEVE_LIMIT.  Returns a numpy array of the same
+    shape.  Useful for sharding or hashing large ID ranges.
+    """
+    arr = _as_integers(values)
+    if arr.size == 0:
+        return arr.astype(np.int64)
+    if arr.min() < 0:
+        raise ValueError('values must be non-negative')
+    if arr.max() > SIEVE_LIMIT:
+        raise ValueError('values must not exceed SIEVE_LIMIT = {}'.format(SIEVE_LIMIT))
+    arr = arr.astype(np.int64)
+    return spf_table(int(arr.max()))[arr].astype(np.int64)
@@ -0,0 +1,198 @@
+import os
+import sys
+import glob
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import color_sci
+except ImportError:
+    import color_sci
+
+"""
+Command line batch runner for spectral conversion jobs.
+
+Converts spectral CSV / Parquet files (columns 'nm' and '%R') to CIE XYZ,
+L*a*b* and CCT with color_sci.spectra2xyz and color_sci.returnCCT, in
+parallel, and writes one consolidated CSV or Parquet result.  Files of
+Test Color Sample L*a*b* measurements (columns 'Test Color Sample', 'L*',
+'a*', 'b*') are passed to color_sci.returnCRI instead.
+
+usage:
+python spectra_batch.py data/*.csv more_data/ -o results.parquet --observer 2 --workers 8
+"""
+
+METRICS = ('xyz', 'lab', 'cct', 'cri')
+SPECTRA_SUFFIXES = ('.csv', '.parquet')
+
+def find_files(inputs):
+    """
+    Expands a list of file paths, glob patterns and directories into a
+    sorted list of spectral files.  Directories are searched recursively
+    for .csv and .parquet files.
+    """
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files.extend(
+                str(path) for path in Path(item).glob('**/*')
+                if path.is_file() and path.suffix.lower() in SPECTRA_SUFFIXES
+            )
+        else:
+            files.extend(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+    return sorted(dict.fromkeys(files))
+
+def read_spectra(path):
+    """
+    Reads a spectral CSV or Parquet file as a DataFrame.
+    """
+    if Path(path).suffix.lower() == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+def convert_file(path, metrics=('xyz', 'lab', 'cct'), observer=10, illuminant='D65'):
+    """
+    Converts one file and returns a dict of results.  Failures are
+    recorded in the 'error' entry rather than raised, so one bad file does
+    not stop a batch.
+    """
+    result = {'file': str(path), 'error': None}
+    try:
+        df = read_spectra(path)
+        if 'Test Color Sample' in df.columns:
+            if 'cri' not in metrics:
+                result['error'] = 'TCS table; pass --metrics cri'
+                return result
+            result['CRI'] = color_sci.returnCRI(df)
+            return result
+
+        if 'nm' in df.columns:
+            # spectra2xyz aligns the spectra with the CIE tables on the index
+            df = df.set_index('nm')
+        xyz = color_sci.spectra2xyz(df, observer=observer, illuminant=illuminant)
+        if 'xyz' in metrics:
+            result['X'], result['Y'], result['Z'] = (float(v) for v in xyz)
+        if 'lab' in metrics:
+            # Same conversion as color_sci.spectra2lab, without integrating twice
+            lab = color_sci.xyz2lab(xyz, observer=observer, illuminant=illuminant)
+            result['L*'], result['a*'], result['b*'] = (float(v) for v in lab)
+        if 'cct' in metrics:
+            result['CCT'] = float(color_sci.returnCCT(xyz))
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+    return result
+
+def _convert_chunk(paths, metrics, observer, illuminant):
+    """
+    local function converting a chunk of files in a worker process
+    """
+    return [convert_file(path, metrics, observer, illuminant) for path in paths]
+
+def convert_files(files, metrics=('xyz', 'lab', 'cct'), observer=10, illuminant='D65',
+        workers=None, chunk_size=16):
+    """
+    Converts a list of files with convert_file() and returns one DataFrame
+    with a row per file, in the order of files.
+
+    parameters:
+    workers: default None.  Number of worker processes (None uses
+    os.cpu_count()).  workers=1 runs in the current process.
+    chunk_size: default 16.  Number of files sent to a worker at a time.
+    """
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+    if workers == 1:
+        results = [_convert_chunk(chunk, metrics, observer, illuminant) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                _convert_chunk, chunks, [metrics] * len(chunks),
+                [observer] * len(chunks), [illuminant] * len(chunks)
+            ))
+    records = [record for chunk in results for record in chunk]
+
+    columns = ['file']
+    if 'xyz' in metrics:
+        columns += ['X', 'Y', 'Z']
+    if 'lab' in metrics:
+        columns += ['L*', 'a*', 'b*']
+    if 'cct' in metrics:
+        columns += ['CCT']
+    if 'cri' in metrics:
+        columns += ['CRI']
+    columns += ['error']
+    return pd.DataFrame(records, columns=columns)
+
+def _parse_args(argv=None):
+    """
+    local function defining the command line interface
+    """
+    parser = argparse.ArgumentParser(
+        description='Convert spectral CSV / Parquet files to CIE XYZ, L*a*b*, CCT and CRI.'
+    )
+    parser.add_argument(
+        'inputs', nargs='+',
+        help='Spectral files, glob patterns (quote them) or directories.'
+    )
+    parser.add_argument(
+        '-o', '--output', required=True,
+        help='Output file.  Format follows the extension unless --format is given.'
+    )
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None)
+    parser.add_argument(
+        '--metrics', default='xyz,lab,cct',
+        help='Comma separated metrics from: {}.  Default: xyz,lab,cct'.format(','.join(METRICS))
+    )
+    parser.add_argument('--observer', type=int, choices=[2, 10], default=10)
+    parser.add_argument('--illuminant', choices=['A', 'D50', 'D65', 'D75'], default='D65')
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help='Worker processes.  Default: number of CPUs.  1 disables multiprocessing.'
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=16, help='Files per worker task.  Default: 16'
+    )
+    args = parser.parse_args(argv)
+    args.metrics = tuple(m.strip().lower() for m in args.metrics.split(',') if m.strip())
+    unknown = set(args.metrics) - set(METRICS)
+    if unknown:
+        parser.error('unknown metrics: {}'.format(', '.join(sorted(unknown))))
+    if args.format is None:
+        args.format = 'parquet' if Path(args.output).suffix.lower() == '.parquet' else 'csv'
+    return args
+
+def main(argv=None):
+    """
+    Command line entry point.  Returns the exit code: 0 if every file
+    converted, 1 if any file failed, 2 if no input files were found.
+    """
+    args = _parse_args(argv)
+    files = find_files(args.inputs)
+    if not files:
+        print('No input files found.', file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    df = convert_files(
+        files, metrics=args.metrics, observer=args.observer, illuminant=args.illuminant,
+        workers=args.workers, chunk_size=args.chunk_size
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.format == 'parquet':
+        df.to_parquet(args.output, index=False)
+    else:
+        df.to_csv(args.output, index=False)
+
+    errors = int(df['error'].notna().sum())
+    print('{} files in {:.2f} s ({:.1f} files/s), {} errors.  Results written to {}'.format(
+        len(files), elapsed, len(files) / elapsed if elapsed > 0 else np.inf, errors, args.output
+    ))
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# wtdlib is a flat collection of modules, make them importable from the tests
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,188 @@
+import sys
+import types
+import importlib
+
+import pandas as pd
+import pytest
+
+import utils_collab
+
+
+class FakeWorksheet:
+    """
+    Stand-in for gspread.Worksheet
+    """
+    def __init__(self, id, rows):
+        self.id = id
+        self.rows = rows
+        self.downloads = 0
+
+    def get_all_values(self):
+        self.downloads += 1
+        return self.rows
+
+
+class FakeSpreadsheet:
+    """
+    Stand-in for gspread.Spreadsheet
+    """
+    def __init__(self, id, worksheets, modified='2026-01-01T00:00:00.000Z'):
+        self.id = id
+        self.worksheets = {ws.id: ws for ws in worksheets}
+        self.lastUpdateTime = modified
+
+    def get_worksheet_by_id(self, ws_id):
+        if ws_id not in self.worksheets:
+            raise utils_collab.WorksheetNotFound(ws_id)
+        return self.worksheets[ws_id]
+
+    @property
+    def sheet1(self):
+        return next(iter(self.worksheets.values()))
+
+
+class FakeClient:
+    """
+    Stand-in for gspread.Client
+    """
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+
+    def open(self, name):
+        return self.spreadsheet
+
+    def open_by_url(self, url):
+        return self.spreadsheet
+
+
+ROWS = [
+    ['name', 'count', 'date', 'amount'],
+    ['a', '1', '2024-01-01', '1,000.5'],
+    ['b', '2', '2024-02-03', ''],
+]
+
+
+@pytest.fixture
+def client():
+    return FakeClient(FakeSpreadsheet('sheet-id', [FakeWorksheet(0, ROWS)]))
+
+
+def test_import_does_not_authenticate(monkeypatch):
+    calls = []
+    google = types.ModuleType('google')
+    colab = types.ModuleType('google.colab')
+    auth = types.ModuleType('google.colab.auth')
+    drive = types.ModuleType('google.colab.drive')
+    auth.authenticate_user = lambda: calls.append('authenticate_user')
+    drive.mount = lambda *args, **kwargs: calls.append('mount')
+    google.colab = colab
+    colab.auth, colab.drive = auth, drive
+    for name, module in [
+            ('google', google), ('google.colab', colab),
+            ('google.colab.auth', auth), ('google.colab.drive', drive)]:
+        monkeypatch.setitem(sys.modules, name, module)
+
+    module = importlib.reload(utils_collab)
+    assert calls == []
+    assert module._gc is None
+
+
+def test_read_gsheet(client):
+    df = utils_collab.read_gsheet('sheet', client=client)
+    assert list(df.columns) == ROWS[0]
+    assert df['name'].tolist() == ['a', 'b']
+
+
+def test_cache_hit_skips_download(client, tmp_path):
+    pytest.importorskip('pyarrow')
+    worksheet = client.spreadsheet.worksheets[0]
+    first = utils_collab.read_gsheet_cached('sheet', client=client, cache_dir=tmp_path)
+    second = utils_collab.read_gsheet_cached('sheet', client=client, cache_dir=tmp_path)
+    assert worksheet.downloads == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_new_modified_time_downloads_again(client, tmp_path):
+    pytest.importorskip('pyarrow')
+    worksheet = client.spreadsheet.worksheets[0]
+    utils_collab.read_gsheet_cached('sheet', client=client, cache_dir=tmp_path)
+    client.spreadsheet.lastUpdateTime = '2026-02-01T00:00:00.000Z'
+    worksheet.rows = ROWS + [['c', '3', '2024-03-04', '7']]
+    df = utils_collab.read_gsheet_cached('sheet', client=client, cache_dir=tmp_path)
+    assert worksheet.downloads == 2
+    assert len(df) == 3
+    # The stale copy is replaced
+    assert len(list(tmp_path.glob('*.parquet'))) == 1
+
+
+def test_infer_dtypes(client, tmp_path):
+    pytest.importorskip('pyarrow')
+    df = utils_collab.read_gsheet_cached('sheet', client=client, cache_dir=tmp_path)
+    assert pd.api.types.is_string_dtype(df['name'])
+    assert pd.api.types.is_integer_dtype(df['count'])
+    assert pd.api.types.is_datetime64_any_dtype(df['date'])
+    assert df['amount'].iloc[0] == 1000.5
+    assert pd.isna(df['amount'].iloc[1])
+
+
+def test_blank_and_repeated_headers(tmp_path):
+    pytest.importorskip('pyarrow')
+    rows = [['', '', 'x', 'x'], ['1', '2', '3', '4']]
+    client = FakeClient(FakeSpreadsheet('sheet-id', [FakeWorksheet(0, rows)]))
+    df = utils_collab.read_gsheet_cached('sheet', client=client, cache_dir=tmp_path)
+    assert list(df.columns) == ['Unnamed: 0', 'Unnamed: 1', 'x', 'x.1']
+
+
+class APIError(Exception):
+    """
+    Stand-in for gspread.exceptions.APIError
+    """
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class RateLimitedSpreadsheet(FakeSpreadsheet):
+    """
+    Fails the first worksheet lookup with a 429 rate limit error
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failures = 1
+
+    def get_worksheet_by_id(self, ws_id):
+        if self.failures:
+            self.failures -= 1
+            raise APIError(429)
+        return super().get_worksheet_by_id(ws_id)
+
+
+def test_read_gsheets_retries_rate_limited_lookup():
+    spreadsheet = RateLimitedSpreadsheet(
+        'sheet-id', [FakeWorksheet(0, ROWS), FakeWorksheet(5, [['x'], ['1']])]
+    )
+    result = utils_collab.read_gsheets(
+        [('sheet', 5)], client=FakeClient(spreadsheet), backoff=0.001
+    )
+    assert list(result[('sheet', 5)].columns) == ['x']
+
+
+def test_read_gsheets_missing_worksheet_raises(client):
+    with pytest.raises(utils_collab.WorksheetNotFound):
+        utils_collab.read_gsheets([('sheet', 5)], client=client)
+
+
+def test_write_gsheet_missing_worksheet_raises(client):
+    with pytest.raises(utils_collab.WorksheetNotFound):
+        utils_collab.write_gsheet(pd.DataFrame({'a': [1]}), 'sheet', ws_id=5, client=client)
+
+
+@pytest.mark.parametrize('values', [
+    ['1,2', '3,4', '5,6'],
+    ['May', 'June', 'July'],
+    ['2024-01-{:02d}'.format(day) for day in range(1, 11)] + ['TBD'],
+])
+def test_infer_dtypes_keeps_ambiguous_columns_as_strings(values):
+    df = utils_collab.infer_dtypes(pd.DataFrame({'col': pd.Series(values, dtype=object)}))
+    assert pd.api.types.is_string_dtype(df['col'])
+    assert df['col'].tolist() == values
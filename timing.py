@@ -0,0 +1,208 @@
+import time
+import math
+import random
+import asyncio
+import inspect
+import functools
+import threading
+
+import numpy as np
+import pandas as pd
+
+"""
+    Timing Functions
+
+countdown() and countdown_async() schedule every tick against a fixed
+time.monotonic() deadline, so printing and loop overhead never accumulate
+as drift (unlike sleeping a fixed 1 second per iteration).
+
+Stopwatch times code with time.perf_counter_ns() as a context manager or a
+decorator.  Each label keeps a running count, total, min and max, plus a
+fixed-size random sample (reservoir) of durations for percentiles, so
+memory stays bounded in long running services.  stopwatch_report()
+summarizes every label, making it a lightweight profiler for hot paths.
+"""
+
+def _format_remaining(remaining):
+    """
+    local function formatting seconds as MM:SS
+    """
+    mins, secs = divmod(int(math.ceil(remaining)), 60)
+    return '{:02d}:{:02d}'.format(mins, secs)
+
+def countdown(t, message="Time's up!", interval=1.0, display=True):
+    """
+    Drift-free replacement for misc.timer().  Blocks for t seconds,
+    printing the time remaining every interval seconds.
+
+    parameters:
+    message: default "Time's up!".  String to print upon conclusion of the
+    function.  If message == None, nothing will be printed.
+    interval: default 1.0.  Seconds between updates of the display.
+    display: default True.  If False, the remaining time is not printed.
+    """
+    start = time.monotonic()
+    deadline = start + t
+    tick = 0
+    while True:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        if display:
+            print(_format_remaining(deadline - now), end="\r")  # Overwrite previous output
+        tick += 1
+        # Sleep until the next scheduled tick, not for a fixed interval
+        time.sleep(max(0.0, min(start + tick * interval, deadline) - time.monotonic()))
+    if message is not None:
+        print(message)
+
+async def countdown_async(t, message="Time's up!", interval=1.0, display=True):
+    """
+    asyncio version of countdown().  Awaits t seconds without blocking the
+    event loop.  Parameters are the same as countdown().
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + t
+    tick = 0
+    while True:
+        now = loop.time()
+        if now >= deadline:
+            break
+        if display:
+            print(_format_remaining(deadline - now), end="\r")
+        tick += 1
+        await asyncio.sleep(max(0.0, min(start + tick * interval, deadline) - loop.time()))
+    if message is not None:
+        print(message)
+
+# Number of durations sampled per label for percentiles
+RESERVOIR_SIZE = 1024
+
+_timings = {}
+_timings_lock = threading.Lock()
+
+def _record(label, elapsed_ns):
+    """
+    local function adding one measurement to the running statistics of label.
+    Percentile samples use reservoir sampling (Algorithm R), so every
+    measurement has the same chance of being kept.
+    https://en.wikipedia.org/wiki/Reservoir_sampling#Simple:_Algorithm_R
+    """
+    with _timings_lock:
+        stats = _timings.get(label)
+        if stats is None:
+            _timings[label] = {
+                'count': 1, 'total': elapsed_ns, 'min': elapsed_ns, 'max': elapsed_ns,
+                'sample': [elapsed_ns],
+            }
+            return
+        stats['count'] += 1
+        stats['total'] += elapsed_ns
+        if elapsed_ns < stats['min']:
+            stats['min'] = elapsed_ns
+        if elapsed_ns > stats['max']:
+            stats['max'] = elapsed_ns
+        sample = stats['sample']
+        if len(sample) < RESERVOIR_SIZE:
+            sample.append(elapsed_ns)
+        else:
+            slot = random.randrange(stats['count'])
+            if slot < RESERVOIR_SIZE:
+                sample[slot] = elapsed_ns
+
+class Stopwatch:
+    """
+    Times code with time.perf_counter_ns() and records each measurement
+    under label (see stopwatch_report()).
+
+    usage as a context manager:
+    with Stopwatch('load') as sw:
+        ...
+    sw.elapsed  # seconds
+
+    usage as a decorator (label defaults to the function's qualified name):
+    @Stopwatch()
+    def func(): ...
+    """
+    def __init__(self, label=None):
+        self.label = label
+        self.elapsed_ns = None
+        self._starts = []
+
+    @property
+    def elapsed(self):
+        """
+        Duration of the most recent measurement in seconds
+        """
+        return None if self.elapsed_ns is None else self.elapsed_ns / 1e9
+
+    def __enter__(self):
+        self._starts.append(time.perf_counter_ns())
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed_ns = time.perf_counter_ns() - self._starts.pop()
+        _record(self.label, self.elapsed_ns)
+        return False
+
+    def __call__(self, func):
+        label = self.label if self.label is not None else func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _record(label, time.perf_counter_ns() - start)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    _record(label, time.perf_counter_ns() - start)
+        return wrapper
+
+def stopwatch_report(percentiles=(50, 90, 99), unit='ms'):
+    """
+    Returns a DataFrame summarizing every Stopwatch label: call count,
+    total, mean, min, max and the requested percentiles.  Count, total,
+    mean, min and max are exact.  Percentiles are exact up to
+    RESERVOIR_SIZE calls per label, and estimated from a random sample of
+    RESERVOIR_SIZE calls beyond that.
+
+    parameters:
+    percentiles: default (50, 90, 99).  Percentiles to report.
+    unit: default 'ms'.  Time unit of the report: 's', 'ms', 'us' or 'ns'.
+    """
+    scale = {'s': 1e9, 'ms': 1e6, 'us': 1e3, 'ns': 1.0}[unit]
+    with _timings_lock:
+        timings = {label: dict(stats, sample=list(stats['sample'])) for label, stats in _timings.items()}
+
+    records = []
+    for label, stats in timings.items():
+        record = {
+            'label': label, 'count': stats['count'],
+            'total': stats['total'] / scale, 'mean': stats['total'] / stats['count'] / scale,
+            'min': stats['min'] / scale, 'max': stats['max'] / scale,
+        }
+        for p, value in zip(percentiles, np.percentile(stats['sample'], percentiles)):
+            record['p{:g}'.format(p)] = value / scale
+        records.append(record)
+    columns = ['label', 'count', 'total', 'mean', 'min', 'max'] + ['p{:g}'.format(p) for p in percentiles]
+    return pd.DataFrame(records, columns=columns).sort_values('total', ascending=False, ignore_index=True)
+
+def reset_stopwatch(label=None):
+    """
+    Clears the recorded statistics of label, or of every label if None.
+    Set RESERVOIR_SIZE before recording to change the percentile sample size.
+    """
+    with _timings_lock:
+        if label is None:
+            _timings.clear()
+        else:
+            _timings.pop(label, None)
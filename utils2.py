@@ -10,6 +10,7 @@ import subprocess
 import platform
 import ast
 import math
+import io
 
 import numpy as np
 import pandas as pd
@@ -99,28 +100,154 @@ def date_to_datetime(tdy):
     tdy_dt = dt.datetime(tdy.year, tdy.month, tdy.day)
     return tdy_dt
 
-def isdst(soonish):
+# DST rules as (start, end, clock).  start and end are (month, nth, weekday,
+# hour) with weekday Monday = 0, ..., Sunday = 6, nth = -1 for the last
+# weekday of the month, and hour the clock time of the switch.  clock is
+# 'local' if the hours are local wall clock times, or 'utc' if they are UTC.
+DST_RULES = {
+    # 2nd Sunday of March 02:00 - 1st Sunday of November 02:00 (local time)
+    'US': ((3, 2, 6, 2), (11, 1, 6, 2), 'local'),
+    # last Sunday of March 01:00 UTC - last Sunday of October 01:00 UTC
+    'EU': ((3, -1, 6, 1), (10, -1, 6, 1), 'utc'),
+    # 1st Sunday of October 02:00 - 1st Sunday of April 03:00 (local time)
+    'AU': ((10, 1, 6, 2), (4, 1, 6, 3), 'local'),
+}
+
+def _as_datetime64(dates, utc=False):
+    """
+    local function converting a date, datetime, string, array-like or
+    pandas Series into a numpy datetime64 array, keeping its resolution.
+    Timezone aware Series / DatetimeIndex are converted to local wall time,
+    or to UTC if utc=True.
+    """
+    if isinstance(getattr(dates, 'dtype', None), pd.DatetimeTZDtype):
+        accessor = dates.dt if isinstance(dates, pd.Series) else dates
+        if utc:
+            dates = accessor.tz_convert('UTC')
+            accessor = dates.dt if isinstance(dates, pd.Series) else dates
+        dates = accessor.tz_localize(None)
+    arr = np.asarray(dates)
+    if arr.dtype.kind != 'M':
+        arr = np.asarray(pd.to_datetime(arr.ravel())).reshape(arr.shape)
+    return arr
+
+def _second_occurrence(dates):
+    """
+    local function flagging the timestamps of a timezone aware Series /
+    DatetimeIndex that fall in the second occurrence of a repeated wall
+    clock hour (the UTC offset dropped within the previous hour)
+    """
+    index = pd.DatetimeIndex(dates)
+    offset = index.tz_localize(None) - index.tz_convert('UTC').tz_localize(None)
+    earlier = index - pd.Timedelta(hours=1)
+    earlier_offset = earlier.tz_localize(None) - earlier.tz_convert('UTC').tz_localize(None)
+    return np.asarray(offset < earlier_offset).reshape(np.shape(dates))
+
+def _as_days(dates):
+    """
+    local function converting a date, datetime, string, array-like or
+    pandas Series into a numpy datetime64[D] array
+    """
+    return _as_datetime64(dates).astype('datetime64[D]')
+
+def _like_input(result, dates):
+    """
+    local function returning result as a Series if dates is a Series
+    """
+    if isinstance(dates, pd.Series):
+        return pd.Series(result, index=dates.index, name=dates.name)
+    return result
+
+def nth_weekday(years, month, nth, weekday):
+    """
+    Returns the date of the nth weekday of the month for each year in
+    years as a datetime64[D] array.  (i.e. nth_weekday(2024, 3, 2, 6) is
+    the 2nd Sunday of March 2024).  weekday: Monday = 0, ..., Sunday = 6.
+    nth = -1 returns the last weekday of the month.
+    """
+    years = np.asarray(years, dtype=np.int64)
+    months = (years - 1970) * 12 + (month - 1)
+    if nth > 0:
+        first = months.astype('datetime64[M]').astype('datetime64[D]')
+        offset = (weekday - weekday_array(first)) % 7 + 7 * (nth - 1)
+        return first + offset
+    last = (months + 1).astype('datetime64[M]').astype('datetime64[D]') - 1
+    offset = (weekday_array(last) - weekday) % 7 + 7 * (-nth - 1)
+    return last - offset
+
+def isdst_array(dates, rule='US'):
+    """
+    Vectorized Daylight Saving Time flags.  Takes datetime64 arrays,
+    pandas Series, or anything np.datetime64 / pd.to_datetime accepts, and
+    returns a boolean array (or Series) of the same shape.
+
+    Timestamps are compared with the switch time of the rule at their own
+    resolution, so i.e. 2024-03-10T01:00 is not DST and 2024-03-10T03:00 is
+    for the US rule.  Plain dates are treated as midnight.
+    For 'local' rules, timestamps are local wall clock times.  The repeated
+    hour when DST ends is flagged as DST (its first occurrence) unless the
+    timestamps are timezone aware, and the skipped hour when DST starts is
+    flagged as DST.
+    For 'utc' rules (i.e. 'EU'), naive timestamps must be in UTC.
+    Timezone aware Series are converted to the clock of the rule.
+
+    parameters:
+    rule: default 'US'.  Key of DST_RULES ('US', 'EU', 'AU') or a custom
+    (start, end, clock) rule (see DST_RULES).  For custom rules, clock
+    defaults to 'local' and hour to 0.
+    """
+    rule = DST_RULES[rule] if isinstance(rule, str) else rule
+    start_rule, end_rule = rule[0], rule[1]
+    clock = rule[2] if len(rule) > 2 else 'local'
+    times = _as_datetime64(dates, utc=(clock == 'utc'))
+    years = times.astype('datetime64[Y]').astype(np.int64) + 1970
+
+    def transition(month, nth, weekday, hour=0):
+        return nth_weekday(years, month, nth, weekday) + np.timedelta64(int(round(hour * 60)), 'm')
+
+    start = transition(*start_rule)
+    end = transition(*end_rule)
+    if start_rule[0] <= end_rule[0]:
+        flags = (times >= start) & (times < end)
+    else:
+        # Southern hemisphere, DST spans the new year
+        flags = (times >= start) | (times < end)
+    if clock != 'utc' and isinstance(getattr(dates, 'dtype', None), pd.DatetimeTZDtype):
+        # The repeated hour after DST ends is standard time the second time round
+        flags &= ~_second_occurrence(dates)
+    return _like_input(flags, dates)
+
+def weekday_array(dates):
+    """
+    Vectorized day of the week: Monday = 0, ..., Sunday = 6
+    (consistent with datetime.date.weekday()).
+    """
+    days = _as_days(dates).astype(np.int64)
+    # 1970-01-01 was a Thursday
+    return _like_input((days + 3) % 7, dates)
+
+def leap_year_array(dates):
+    """
+    Vectorized leap year flags.  Takes dates (see isdst_array) or an
+    integer array of years.
+    https://en.wikipedia.org/wiki/Leap_year#Algorithm
+    """
+    arr = np.asarray(dates)
+    if arr.dtype.kind in 'iu':
+        years = arr
+    else:
+        years = _as_days(dates).astype('datetime64[Y]').astype(np.int64) + 1970
+    leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    return _like_input(leap, dates)
+
+def isdst(soonish, rule='US'):
     """
     Takes a datetime.datetime object or datetime.date object,
     and returns if the date occurs during Daylight Saving Time.
+    datetime.date objects are treated as midnight.
+    For arrays of dates, use isdst_array().
     """
-    if isinstance(soonish, dt.datetime):
-        soonish = soonish.date()
-    year, weekno, dayofweek = soonish.isocalendar()
-    if weekno > 10 and weekno < 45:
-    # if the week is between the 2nd Sunday of March and the 2nd Sunday of November
-        return True
-    elif weekno == 10:
-    # if the ISO week is the 2nd Sunday of March, check day of week
-        if dayofweek == 7:
-        # if Sunday
-            return True
-    elif weekno == 45:
-    # if the ISO week is the 2nd Sunday of November, check day of week
-        if dayofweek != 7:
-        # if not Sunday
-            return True
-    return False
+    return bool(isdst_array(pd.DatetimeIndex([soonish]), rule=rule)[0])
     
 def daterange(start_date, end_date):
     """
@@ -134,6 +261,16 @@ def daterange(start_date, end_date):
     for n in range(int((end_date - start_date).days)):
         yield start_date + dt.timedelta(n)
 
+def daterange_array(start_date, end_date, step=1):
+    """
+    Vectorized daterange().  Returns a datetime64[D] array of the dates
+    from start_date up to, but excluding, end_date.
+    step: default 1.  Number of days between dates.
+    """
+    return np.arange(
+        np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D'), step
+    )
+
 """
     Math Functions
 """
@@ -144,24 +281,85 @@ def sumproduct(*lists):
     """
     return sum(functools.reduce(operator.mul, data) for data in zip(*lists))
 
+class NearestLookup:
+    """
+    Reusable nearest value lookup, for snapping many readings to the same
+    table (i.e. a calibration table) without rescanning it on every query.
+
+    With points=False (default) the values of a (any shape) are sorted once,
+    and each query is answered with a binary search (np.searchsorted).
+    With points=True, a must be an (n, d) array of points, and queries are
+    answered with a scipy.spatial.cKDTree.
+
+    usage:
+    lookup = NearestLookup(table)
+    values, indices = lookup.query(readings)
+    """
+    def __init__(self, a, points=False):
+        self.a = np.asarray(a)
+        self.points = points
+        if points:
+            from scipy.spatial import cKDTree
+            if self.a.ndim != 2:
+                raise ValueError('points=True requires an (n, d) array')
+            self._tree = cKDTree(self.a)
+        else:
+            flat = self.a.ravel()
+            self._order = np.argsort(flat, kind='stable')
+            self._sorted = flat[self._order]
+
+    def query(self, a0):
+        """
+        Returns (values, indices) of the entries nearest to a0.
+        a0 may be a scalar or an array of queries (for points=True, a
+        single point of shape (d,) or an array of shape (..., d)).
+        For points=False, indices are flat indices into a (as with
+        a.flat[idx]), for points=True they are row indices.
+        """
+        if self.points:
+            dist, idx = self._tree.query(np.asarray(a0))
+            return self.a[idx], idx
+
+        a0 = np.asarray(a0)
+        last = self._sorted.size - 1
+        right = np.clip(np.searchsorted(self._sorted, a0), 0, last)
+        left = np.clip(right - 1, 0, last)
+        # First occurrence of the lower neighbor's value (right already is one)
+        left = np.searchsorted(self._sorted, self._sorted[left])
+        # Choose the closer neighbor.  On ties, choose the one that comes first
+        # in flat order, consistent with np.abs(a - a0).argmin()
+        d_right = np.abs(self._sorted[right] - a0)
+        d_left = np.abs(a0 - self._sorted[left])
+        use_right = (d_right < d_left) | ((d_right == d_left) & (self._order[right] < self._order[left]))
+        pos = np.where(use_right, right, left)
+        return self._sorted[pos], self._order[pos]
+
 def find_nearest(a, a0):
     """
     https://stackoverflow.com/questions/2566412/find-nearest-value-in-numpy-array
-    Finds the nearest value in an array of arbitrary dimension
-    """
-    idx = np.abs(a - a0).argmin()
-    return a.flat[idx]
+    Finds the nearest value in an array of arbitrary dimension.
+    a0 may be a scalar or an array of values.
+    For repeated lookups against the same array, use NearestLookup.
+    """
+    if np.ndim(a0) == 0:
+        # A single query is a linear scan, cheaper than sorting a
+        idx = np.abs(a - a0).argmin()
+        return a.flat[idx]
+    return NearestLookup(a).query(a0)[0]
 
 def factor(x):
     """
-    This function takes an integer, x, and returns a numpy array
-    of the factors of x.
+    This function takes an integer, x, and returns a list
+    of the factors of x.  Trial divides up to sqrt(x).
+    For many numbers, see primes.divisors().
     """
-    factors = []
-    for i in range(1, x + 1):
+    small, large = [], []
+    for i in range(1, math.isqrt(x) + 1):
         if x % i == 0:
-            factors.append(i)
-    return factors
+            small.append(i)
+            if i != x // i:
+                large.append(x // i)
+    return small + large[::-1]
 
 def is_prime(n):
     """
@@ -171,8 +369,10 @@ def is_prime(n):
     Modified for simplicity from a function found on stack exchagne:
     https://stackoverflow.com/questions/15285534/isprime-function-for-python-language
     """
+    if n == 2:
+        return True
     # If even or less than 2
-    if n % 2 == 0 or n <= 2:
+    if n % 2 == 0 or n < 2:
         return False
     # If Odd, determine if not prime
     for i in range(3, int(n**0.5) + 1, 2):
@@ -230,6 +430,126 @@ def sig_figs(x, p):
     mags = 10 ** (p - 1 - np.floor(np.log10(x_positive)))
     return np.round(x * mags) / mags
 
+def _row_chunks(arr, chunk_size):
+    """
+    local function yielding slices along axis 0 of arr, each covering
+    roughly chunk_size elements (at least one row)
+    """
+    row_size = int(np.prod(arr.shape[1:], dtype=np.int64))
+    rows = max(1, chunk_size // max(row_size, 1))
+    for start in range(0, arr.shape[0], rows):
+        yield slice(start, start + rows)
+
+def minmax(arr, axis=None, chunk_size=2**22):
+    """
+    Returns (min, max) of arr computed in a single chunked pass, so each
+    chunk of a large array or np.memmap is read from memory / disk once.
+    Results keep the reduced dimensions (keepdims=True) so they broadcast
+    against arr.
+
+    parameters:
+    axis: default None.  Axis or tuple of axes to reduce.  None reduces all axes.
+    chunk_size: default 2**22.  Approximate number of elements per chunk.
+    """
+    arr = np.asanyarray(arr)
+    if arr.ndim == 0:
+        return arr.min(keepdims=True), arr.max(keepdims=True)
+    if axis is None:
+        axes = tuple(range(arr.ndim))
+    else:
+        axes = tuple(a % arr.ndim for a in np.atleast_1d(axis))
+
+    if 0 in axes:
+        lo = hi = None
+        for sl in _row_chunks(arr, chunk_size):
+            chunk = arr[sl]
+            c_lo, c_hi = chunk.min(axis=axes, keepdims=True), chunk.max(axis=axes, keepdims=True)
+            lo = c_lo if lo is None else np.minimum(lo, c_lo)
+            hi = c_hi if hi is None else np.maximum(hi, c_hi)
+        return lo, hi
+
+    shape = tuple(1 if i in axes else n for i, n in enumerate(arr.shape))
+    lo, hi = np.empty(shape, arr.dtype), np.empty(shape, arr.dtype)
+    for sl in _row_chunks(arr, chunk_size):
+        chunk = arr[sl]
+        chunk.min(axis=axes, keepdims=True, out=lo[sl])
+        chunk.max(axis=axes, keepdims=True, out=hi[sl])
+    return lo, hi
+
+def normalize_chunked(img, scale=1.0, arr_type=float, out=None, axis=None, chunk_size=2**22):
+    """
+    Memory efficient normalize_() for large arrays and np.memmap image stacks.
+    Peak memory stays near one chunk: min and max are found in one chunked
+    pass, and each chunk is scaled in a single temporary buffer and written
+    to out.  Integer output is saturated to the range of arr_type.
+    Constant regions (max == min) are normalized to 0.
+
+    parameters:
+    scale: default 1.0.  Output range is 0 to scale.
+    arr_type: default float.  dtype of the output (i.e. np.uint8 with scale=255).
+    out: default None.  Output array (or np.memmap).  Pass out=img to
+    normalize in place.  If None, a new array of dtype arr_type is created.
+    axis: default None.  Axis or tuple of axes to normalize over.  i.e. for
+    an (n, y, x) image stack, axis=(1, 2) normalizes each image separately.
+    chunk_size: default 2**22.  Approximate number of elements per chunk.
+    """
+    img = np.asanyarray(img)
+    if img.ndim == 0:
+        img = img.reshape(1)
+    if out is None:
+        out = np.empty(img.shape, dtype=arr_type)
+    work_type = np.promote_types(img.dtype, np.float32)
+
+    lo, hi = minmax(img, axis=axis, chunk_size=chunk_size)
+    lo = lo.astype(work_type)
+    span = hi.astype(work_type) - lo
+    # Constant regions divide by inf, giving 0
+    span[span == 0] = np.inf
+
+    if np.issubdtype(out.dtype, np.integer):
+        limits = np.iinfo(out.dtype)
+    else:
+        limits = None
+    per_row = lo.shape[0] != 1
+    for sl in _row_chunks(img, chunk_size):
+        buf = np.subtract(img[sl], lo[sl] if per_row else lo, dtype=work_type)
+        buf *= scale
+        buf /= span[sl] if per_row else span
+        if limits is not None:
+            np.clip(buf, limits.min, limits.max, out=buf)
+        np.copyto(out[sl], buf, casting='unsafe')
+    return out
+
+def sig_figs_chunked(x, p, out=None, chunk_size=2**22):
+    """
+    Memory efficient sig_figs() for large arrays and np.memmaps.
+    Works chunk by chunk with a single temporary buffer per chunk, writing
+    the result to out.  Pass out=x (floating point x) to round in place.
+
+    parameters:
+    out: default None.  Output array.  If None, a new floating point array is created.
+    chunk_size: default 2**22.  Approximate number of elements per chunk.
+    """
+    x = np.asanyarray(x)
+    if x.ndim == 0:
+        return sig_figs(x, p)
+    if out is None:
+        out_type = x.dtype if np.issubdtype(x.dtype, np.floating) else np.float64
+        out = np.empty(x.shape, dtype=out_type)
+
+    for sl in _row_chunks(x, chunk_size):
+        chunk, out_chunk = x[sl], out[sl]
+        mags = np.abs(chunk, dtype=out.dtype)
+        mags[~np.isfinite(mags) | (mags == 0)] = 10**(p-1)
+        np.log10(mags, out=mags)
+        np.floor(mags, out=mags)
+        np.subtract(p - 1, mags, out=mags)
+        np.power(10, mags, out=mags)
+        np.multiply(chunk, mags, out=out_chunk)
+        np.round(out_chunk, out=out_chunk)
+        np.divide(out_chunk, mags, out=out_chunk)
+    return out
+
 """
     List and String Functions
 """
@@ -243,9 +563,67 @@ def parse_tuple(string):
         if type(s) == tuple:
             return s
         return
-    except:
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
         return
 
+_NUMBER = r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*'
+
+def parse_tuple_column(strings, arity=None, dtype=float):
+    """
+    Vectorized parse_tuple() for a whole column of numeric tuple strings
+    such as "(12.5, 3.0)".  Returns (values, valid): an (n, arity) numpy array
+    and a boolean mask of the rows that parsed.
+
+    Each distinct string is parsed only once.  Strings are matched with a
+    regular expression, and only strings the regular expression rejects
+    fall back to ast.literal_eval (via parse_tuple).  Rows that are not
+    tuples of arity numbers are invalid, and are NaN (0 for integer dtype).
+
+    parameters:
+    arity: default None.  Number of elements in each tuple.  If None, the
+    most common number of elements among the rows that look like tuples
+    (strings in parentheses) is used.
+    dtype: default float.  dtype of the returned values.
+    """
+    codes, uniques = pd.factorize(pd.Series(strings), use_na_sentinel=True)
+    uniques = pd.Series(uniques, dtype=object).astype(str)
+
+    if arity is None:
+        # Only strings that look like tuples, weighted by how many rows use them
+        stripped = uniques.str.strip()
+        bracketed = (stripped.str.startswith('(') & stripped.str.endswith(')')).to_numpy()
+        if not bracketed.any():
+            raise ValueError('No tuple strings found to infer arity from.  Pass arity.')
+        inner = stripped.str[1:-1].str.strip().str.rstrip(',')
+        elements = (inner.str.count(',') + 1).to_numpy()
+        rows = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        arity = int(np.argmax(np.bincount(elements[bracketed], weights=rows[bracketed])))
+
+    pattern = r'^\s*\(' + ','.join([_NUMBER] * arity) + (',' if arity == 1 else ',?') + r'\s*\)\s*$'
+    matched = uniques.str.extract(pattern)
+    parsed = matched.notna().all(axis=1).to_numpy().copy()
+    unique_values = np.full((len(uniques), arity), np.nan)
+    if parsed.any():
+        unique_values[parsed] = matched[parsed].to_numpy(dtype=float)
+
+    # Fall back to literal_eval for irregular strings (i.e. '(1, 2.0e)' or '(0x1F, 2)')
+    for i in np.flatnonzero(~parsed):
+        t = parse_tuple(uniques.iloc[i])
+        if t is None or len(t) != arity:
+            continue
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in t):
+            unique_values[i] = t
+            parsed[i] = True
+
+    valid = np.zeros(len(codes), dtype=bool)
+    has_code = codes >= 0
+    valid[has_code] = parsed[codes[has_code]]
+    values = np.full((len(codes), arity), np.nan)
+    values[valid] = unique_values[codes[valid]]
+    if np.issubdtype(np.dtype(dtype), np.integer):
+        values[~valid] = 0
+    return values.astype(dtype), valid
+
 def sort_list(unsorted_list, reverse=True):
     """
     Takes a nx1 list and uses the Python native sorted() function to sort it.
@@ -261,32 +639,62 @@ def unique_entries(lst):
     unique = list(dict.fromkeys(lst))
     return unique
 
-def copydf(df, include_index=True):
+def write_delimited(
+        df, path_or_buf=None, sep='\t', include_index=False, max_rows=None,
+        chunksize=100000, lineterminator='\n', float_format=None):
     """
-    This function uses the pyperclip module to 
-    copy a Pandas DataFrame to the clipboard
-    for pasting into Microsoft Excel, LibreOffice Calc, etc.
-    """
-    if type(df) != type(pd.DataFrame()):
+    Writes a Pandas DataFrame as delimited text (TSV by default, CSV with
+    sep=',').  Rows are formatted by pandas in chunks and streamed to the
+    output, so large frames never build one giant Python string row by row.
+
+    path_or_buf: default None.  File path, open file handle, or pipe
+    (i.e. sys.stdout) to write to.  If None, the text is returned as a string.
+
+    parameters:
+    sep: default '\t'.  Field delimiter.
+    include_index: default False.  If True, the index is written as the
+    first column(s).
+    max_rows: default None.  If set, only the first max_rows rows are written.
+    chunksize: default 100000.  Number of rows formatted per chunk.
+    lineterminator: default '\n'.  Character(s) ending each row.
+    float_format: default None.  Format string for floats (i.e. '%.6g').
+    Fixed precision formatting is considerably faster than full precision.
+    """
+    if not isinstance(df, pd.DataFrame):
         # If a list or numpy array is provided as
         # input, change to a Pandas DataFrame.
         df = pd.DataFrame(df)
-
-    if include_index == True:
-        # Ensure Index Column is Copied
+    if max_rows is not None:
+        df = df.iloc[:max_rows]
+    if include_index:
         df = df.reset_index()
-        to_clipboard = """"""
-    
-    # Copy Column Names
-    for col in df:
-        to_clipboard += str(col) + """\t"""
-    to_clipboard += """\r"""
-    
-    # Copy Each Row of Data
-    for i, row in df.iterrows():
-        for col in df:
-            to_clipboard += str(row[col]) + """\t"""
-        to_clipboard += """\r"""
+
+    if path_or_buf is None:
+        buf = io.StringIO()
+        df.to_csv(
+            buf, sep=sep, index=False, chunksize=chunksize, lineterminator=lineterminator,
+            float_format=float_format
+        )
+        return buf.getvalue()
+    df.to_csv(
+        path_or_buf, sep=sep, index=False, chunksize=chunksize, lineterminator=lineterminator,
+        float_format=float_format
+    )
+
+def copydf(df, include_index=True, max_rows=None):
+    """
+    This function uses the pyperclip module to 
+    copy a Pandas DataFrame to the clipboard
+    for pasting into Microsoft Excel, LibreOffice Calc, etc.
+
+    parameters:
+    include_index: default True.  If True, the index is copied as the first column.
+    max_rows: default None.  If set, only the first max_rows rows are copied.
+    """
+    to_clipboard = write_delimited(
+        df, sep='\t', include_index=include_index, max_rows=max_rows,
+        lineterminator='\r'
+    )
     return pyperclip.copy(to_clipboard)
 
 def pathlib_listdir(directory, reverse=False):
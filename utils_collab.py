@@ -1,53 +1,363 @@
 import os
+import re
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
 import pandas as pd
 
-# Google Collab Authetication Cell
-from google.colab import auth
-auth.authenticate_user()
+try:
+    from gspread.exceptions import WorksheetNotFound
+except ImportError:
+    class WorksheetNotFound(Exception):
+        """
+        Raised by stand-in clients when a worksheet does not exist
+        (gspread.exceptions.WorksheetNotFound if gspread is installed)
+        """
 
-import gspread
-from google.auth import default
-creds, _ = default()
+"""
+Google Collab / Google Sheets helpers.
 
-# If remounting (i.e. to reload updated data), run cell twice
-from google.colab import drive
-drive.mount('/content/gdrive', force_remount=True)
+Authentication and Drive mounting happen lazily: get_client() authenticates
+on first use and mount_drive() mounts Google Drive when called, rather than
+as a side effect of importing this module.  Every reader also takes an
+optional client argument, so any object with the gspread Client interface
+(open, open_by_url, open_by_key) can be used in its place.
+"""
 
-gc = gspread.authorize(creds)
+_gc = None
 
+def get_client():
+    """
+    Returns an authorized gspread client, authenticating the Google Collab
+    user on the first call and reusing the client afterwards.
+    """
+    global _gc
+    if _gc is None:
+        # Google Collab Authetication Cell
+        from google.colab import auth
+        auth.authenticate_user()
+
+        import gspread
+        from google.auth import default
+        creds, _ = default()
+        _gc = gspread.authorize(creds)
+    return _gc
+
+def mount_drive(mount_point='/content/gdrive', force_remount=True):
+    """
+    Mounts Google Drive in the Google Collab notebook.
+    If remounting (i.e. to reload updated data), run cell twice
+    """
+    from google.colab import drive
+    drive.mount(mount_point, force_remount=force_remount)
+
+def _open_spreadsheet(path_str, client=None):
+    """
+    local function to open a spreadsheet by url or file name
+    """
+    gc = get_client() if client is None else client
+    if path_str[0:4].lower() == 'http':
+        return gc.open_by_url(path_str)
+    return gc.open(path_str)
 
+def _get_worksheet(spreadsheet, ws_id=0, fallback=True):
+    """
+    local function returning worksheet ws_id.  If ws_id does not exist, the
+    first worksheet is returned when fallback is True, otherwise
+    WorksheetNotFound is raised.  API errors (i.e. rate limits) always propagate.
+    """
+    try:
+        return spreadsheet.get_worksheet_by_id(ws_id)
+    except WorksheetNotFound:
+        if not fallback:
+            raise
+        return spreadsheet.sheet1
 
-def read_gsheet(path_str, ws_id=0):
+def _rows_to_df(rows):
+    """
+    local function converting get_all_values() rows to a DataFrame,
+    using the 0th row as column names
+    """
+    df = pd.DataFrame.from_records(rows)
+    if df.empty:
+        return df
+    return df.iloc[1:,:].set_axis(list(df.iloc[0,:].values), axis=1)
+
+def read_gsheet(path_str, ws_id=0, client=None):
     """
     Function to read a Google Sheet and return a dataframe.
     Takes either the file name as input (gsheet must be in the same directory as
-    Google Collab notebook), or file url (which can be saved anywhere).  
+    Google Collab notebook), or file url (which can be saved anywhere).
     User must have access to the notebook.
-    
+
     parameters:
     ws_id: default 0.  Integer that corresponds to the worksheet in the Google Sheet
+    client: default None.  gspread client to use.  If None, get_client() is used.
     """
-    if path_str[0:4].lower() == 'http':
-        try:
-            worksheet = gc.open_by_url(path_str).get_worksheet_by_id(ws_id)
-        except:
-            worksheet = gc.open_by_url(path_str).sheet1
-    else:
-        try:
-            worksheet = gc.open(path_str).get_worksheet_by_id(ws_id)
-        except:
-            worksheet = gc.open(path_str).sheet1
-    
+    worksheet = _get_worksheet(_open_spreadsheet(path_str, client=client), ws_id)
 
     # get_all_values gives a list of rows.
     rows = worksheet.get_all_values()
 
     # Convert to a DataFrame and render.
-    df = pd.DataFrame.from_records(rows)
+    return _rows_to_df(rows)
+
+_THOUSANDS = r'^-?\d{1,3}(,\d{3})*(\.\d+)?$'
+
+def infer_dtypes(df, date_format='ISO8601'):
+    """
+    Converts the string columns of a DataFrame read from a Google Sheet to
+    numeric or datetime columns, only when every non-empty cell of the
+    column can be converted.  Otherwise the column is left as strings.
+    Empty strings become NaN / NaT.  Conversion is vectorized per column.
+
+    Commas are only removed from cells that are thousands separated numbers
+    (i.e. '1,000.5'), so a cell such as '1,2' keeps the column as strings.
+
+    parameters:
+    date_format: default 'ISO8601'.  Format passed to pd.to_datetime.  Only
+    ISO 8601 dates (i.e. '2024-01-31', '2024-01-31 12:00') are converted by
+    default, so text such as 'May' is never read as a date.  Use an explicit
+    format (i.e. '%m/%d/%Y') for other date layouts.
+    """
+    df = df.copy()
+    for col in df.columns:
+        s = df[col]
+        if not pd.api.types.is_string_dtype(s):
+            continue
+        s = s.replace('', np.nan)
+        filled = s.notna()
+        if not filled.any():
+            continue
+        thousands = s.str.match(_THOUSANDS, na=False)
+        cleaned = s.where(~thousands, s.str.replace(',', '', regex=False))
+        numeric = pd.to_numeric(cleaned, errors='coerce')
+        if numeric[filled].notna().all():
+            df[col] = numeric
+            continue
+        dates = pd.to_datetime(s, errors='coerce', format=date_format)
+        if dates[filled].notna().all():
+            df[col] = dates
+    return df
+
+def _modified_time(spreadsheet):
+    """
+    local function returning the spreadsheet's last modified time as a
+    string, or None if the client does not report it
+    """
+    modified = getattr(spreadsheet, 'lastUpdateTime', None)
+    if modified is None and hasattr(spreadsheet, 'get_lastUpdateTime'):
+        modified = spreadsheet.get_lastUpdateTime()
+    if callable(modified):
+        modified = modified()
+    return None if modified is None else str(modified)
+
+def _unique_columns(columns):
+    """
+    local function returning unique string column names, following the
+    pandas.read_csv convention: blank names become 'Unnamed: i' and repeated
+    names get '.1', '.2', ... suffixes
+    """
+    names = []
+    seen = set()
+    for i, col in enumerate(columns):
+        name = str(col).strip() or 'Unnamed: {}'.format(i)
+        base, n = name, 0
+        while name in seen:
+            n += 1
+            name = '{}.{}'.format(base, n)
+        seen.add(name)
+        names.append(name)
+    return names
+
+def read_gsheet_cached(
+        path_str, ws_id=0, cache_dir='~/.cache/wtdlib/gsheets', infer_types=True,
+        client=None):
+    """
+    Cached read_gsheet().  Each worksheet is saved locally as Parquet, keyed
+    by spreadsheet ID, worksheet ID and the spreadsheet's modified time, and
+    is only downloaded again when the spreadsheet has changed.
+    Requires pyarrow (or fastparquet) for Parquet support.
+
+    parameters:
+    ws_id: default 0.  Integer that corresponds to the worksheet in the Google Sheet
+    cache_dir: default '~/.cache/wtdlib/gsheets'.  Directory for cached Parquet files.
+    infer_types: default True.  If True, numeric and date columns are
+    converted with infer_dtypes().  If False, all columns are strings.
+    client: default None.  gspread client to use.  If None, get_client() is used.
+
+    Column names are made unique (see _unique_columns) so they can be
+    stored as Parquet.
+    """
+    spreadsheet = _open_spreadsheet(path_str, client=client)
+    worksheet = _get_worksheet(spreadsheet, ws_id)
+    modified = _modified_time(spreadsheet)
+
+    cache_dir = Path(cache_dir).expanduser()
+    prefix = '{}_{}_'.format(spreadsheet.id, worksheet.id)
+    key = re.sub(r'[^0-9A-Za-z]+', '-', modified) if modified is not None else None
+    suffix = '_typed.parquet' if infer_types else '_raw.parquet'
+    cache_file = None if key is None else cache_dir.joinpath(prefix + key + suffix)
+
+    if cache_file is not None and cache_file.is_file():
+        return pd.read_parquet(cache_file)
+
+    df = _rows_to_df(worksheet.get_all_values())
+    # Parquet requires unique string column names
+    df.columns = _unique_columns(df.columns)
+    if infer_types:
+        df = infer_dtypes(df)
+
+    if cache_file is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Remove stale copies of this worksheet
+        for old in cache_dir.glob(prefix + '*' + suffix):
+            old.unlink()
+        df.to_parquet(cache_file)
+    return df
+
+def _with_backoff(func, max_retries=5, backoff=1.0):
+    """
+    local function calling func(), retrying with exponential backoff when
+    the Google API reports a rate limit (429) or a transient server error
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            status = getattr(response, 'status_code', None) or getattr(e, 'code', None)
+            if status not in (429, 500, 502, 503, 504) or attempt == max_retries:
+                raise
+            time.sleep(backoff * 2**attempt + random.uniform(0, backoff))
+
+def read_gsheets(
+        sheets, max_workers=4, infer_types=False, client=None, max_retries=5,
+        backoff=1.0):
+    """
+    Reads many worksheets (or ranges) concurrently and returns a dict of
+    DataFrames.  Each spreadsheet is opened once and its handle is shared
+    by every worksheet read from it.  Requests that hit the API rate limit
+    are retried with exponential backoff.
+
+    sheets: list of sheets to read.  Each entry is either a path_str (see
+    read_gsheet), a (path_str, ws_id) tuple, or a (path_str, ws_id, range)
+    tuple where range is in A1 notation (i.e. 'A1:D100').
+    Unlike read_gsheet, a missing ws_id raises WorksheetNotFound rather
+    than reading the first worksheet.
+    The returned dict is keyed by the entries of sheets.
+
+    parameters:
+    max_workers: default 4.  Maximum number of concurrent requests.
+    infer_types: default False.  If True, columns are converted with infer_dtypes().
+    client: default None.  gspread client to use.  If None, get_client() is used.
+    max_retries: default 5.  Number of retries for rate limited requests.
+    backoff: default 1.0.  Seconds to wait before the first retry, doubled
+    on every following retry.
+    """
+    gc = get_client() if client is None else client
+    requests = []
+    for sheet in sheets:
+        if isinstance(sheet, str):
+            requests.append((sheet, sheet, 0, None))
+        else:
+            sheet = tuple(sheet)
+            requests.append((sheet,) + sheet + (0, None)[len(sheet) - 1:])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        paths = list(dict.fromkeys(path_str for _, path_str, _, _ in requests))
+        opened = pool.map(
+            lambda path_str: _with_backoff(
+                lambda: _open_spreadsheet(path_str, client=gc), max_retries, backoff
+            ),
+            paths
+        )
+        spreadsheets = dict(zip(paths, opened))
+
+        def fetch(request):
+            key, path_str, ws_id, range_name = request
+            worksheet = _with_backoff(
+                lambda: _get_worksheet(spreadsheets[path_str], ws_id, fallback=False),
+                max_retries, backoff
+            )
+            if range_name is None:
+                rows = _with_backoff(worksheet.get_all_values, max_retries, backoff)
+            else:
+                rows = _with_backoff(lambda: worksheet.get(range_name), max_retries, backoff)
+            df = _rows_to_df(list(rows))
+            if infer_types:
+                df = infer_dtypes(df)
+            return key, df
+
+        return dict(pool.map(fetch, requests))
+
+def _a1(row, col):
+    """
+    local function converting 1 based row and column numbers to A1 notation
+    """
+    letters = ''
+    while col > 0:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters + str(row)
+
+def write_gsheet(
+        df, path_str, ws_id=0, start='A1', include_header=True, chunk_rows=5000,
+        client=None, max_retries=5, backoff=1.0):
+    """
+    Writes a DataFrame to a Google Sheet worksheet in chunks of chunk_rows
+    rows, each sent as one batch_update request.  The worksheet is grown if
+    it is too small.  Rate limited requests are retried with exponential
+    backoff.  A missing ws_id raises WorksheetNotFound.
+
+    parameters:
+    ws_id: default 0.  Integer that corresponds to the worksheet in the Google Sheet
+    start: default 'A1'.  Top left cell to write to.
+    include_header: default True.  If True, column names are written as the first row.
+    chunk_rows: default 5000.  Number of rows per batch_update request.
+    client: default None.  gspread client to use.  If None, get_client() is used.
+    max_retries: default 5.  Number of retries for rate limited requests.
+    backoff: default 1.0.  Seconds to wait before the first retry.
+    """
+    spreadsheet = _with_backoff(
+        lambda: _open_spreadsheet(path_str, client=client), max_retries, backoff
+    )
+    worksheet = _with_backoff(
+        lambda: _get_worksheet(spreadsheet, ws_id, fallback=False), max_retries, backoff
+    )
+
+    # Convert to JSON serializable values, with empty cells for NaN / NaT
+    frame = df.copy()
+    for col in frame.columns:
+        if not (pd.api.types.is_numeric_dtype(frame[col]) or pd.api.types.is_bool_dtype(frame[col])):
+            frame[col] = frame[col].astype(str).where(frame[col].notna(), '')
+    rows = frame.astype(object).where(frame.notna(), '').to_numpy().tolist()
+    if include_header:
+        rows = [[str(col) for col in frame.columns]] + rows
+    if not rows:
+        return
+
+    match = re.match(r'([A-Za-z]+)(\d+)$', start)
+    first_col = 0
+    for letter in match.group(1).upper():
+        first_col = first_col * 26 + ord(letter) - 64
+    first_row = int(match.group(2))
+    last_row = first_row + len(rows) - 1
+    last_col = first_col + len(rows[0]) - 1
 
-    # Set 0th row as column names
-    df = df.iloc[1:,:].set_axis(list(df.iloc[0,:].values), axis=1)
+    if last_row > worksheet.row_count:
+        _with_backoff(lambda: worksheet.add_rows(last_row - worksheet.row_count), max_retries, backoff)
+    if last_col > worksheet.col_count:
+        _with_backoff(lambda: worksheet.add_cols(last_col - worksheet.col_count), max_retries, backoff)
 
-    return df
\ No newline at end of file
+    for i in range(0, len(rows), chunk_rows):
+        chunk = rows[i:i + chunk_rows]
+        cell_range = '{}:{}'.format(
+            _a1(first_row + i, first_col), _a1(first_row + i + len(chunk) - 1, last_col)
+        )
+        _with_backoff(
+            lambda: worksheet.batch_update([{'range': cell_range, 'values': chunk}]),
+            max_retries, backoff
+        )